@@ -10,71 +10,248 @@ Example:
 """
 
 import argparse
+import logging
+import multiprocessing
+import os
+import shutil
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from PIL import Image, UnidentifiedImageError
+import PIL
+from PIL import Image, ImageOps, ImageSequence, UnidentifiedImageError
 import sys
+from resize import RESIZE_BACKENDS, backend_available, resize_image, resize_opencv_array
+
+try:
+    # Optional: `pip install blake3` for faster duplicate detection
+    from blake3 import blake3 as file_hasher
+except ImportError:
+    from hashlib import blake2b as file_hasher
+
+try:
+    # Optional: `pip install webp` encodes still images through libwebp directly
+    import numpy as np
+    import webp
+except ImportError:
+    webp = None
 
 # Defaults (you can change)
 DEFAULT_INPUT = Path.cwd() / "input"
 DEFAULT_OUTPUT = Path.cwd() / "output"
 PIL_SUPPORTED = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp"}
+JPEG_EXTS = {".jpg", ".jpeg"}
+EXIF_ORIENTATION = 0x0112
+FFMPEG_BATCH = 32  # inputs per ffmpeg process; keeps the command line and open files bounded
+WEBP_PRESETS = ("default", "picture", "photo", "drawing", "icon", "text")
+DEFAULT_QUALITY = 60
+WINDOWS_MAX_WORKERS = 61
+DEFAULT_METHOD = 4  # libwebp's own default, used when the output size isn't known up front
+# Auto --method by output pixel area: (area below, lossy method, lossless preset level).
+# Small images gain little from an exhaustive search, big stills gain the most.
+AUTO_TIERS = ((256 * 256, 0, 1), (1024 * 1024, 2, 3), (None, 4, 6))
+# cwebp -z <level> presets as (method, quality/effort), from libwebp's WebPConfigLosslessPreset
+LOSSLESS_PRESETS = ((0, 0), (1, 20), (2, 25), (3, 30), (3, 50), (4, 50), (4, 75), (4, 90), (5, 90), (6, 100))
+
+log = logging.getLogger("webping")
+
+def setup_logging(queue, level: int):
+    # Every process (main and pool workers) only enqueues records; a single QueueListener
+    # thread in the main process formats and writes them, so workers never block on the
+    # terminal and their lines don't interleave
+    log.handlers[:] = [QueueHandler(queue)]
+    log.setLevel(level)
+    log.propagate = False
+
+def pillow_variant() -> str:
+    # Pillow-SIMD is a drop-in fork (SSE4/AVX2 resize kernels) versioned as "<pillow>.postN"
+    version = PIL.__version__
+    if ".post" in version:
+        return f"Pillow-SIMD {version}"
+    return f"Pillow {version}"
 
+@lru_cache(maxsize=1)
 def ffmpeg_available() -> bool:
+    # A PATH lookup instead of spawning `ffmpeg -version`, and only once per process
+    return shutil.which("ffmpeg") is not None
+
+def target_size(orig_w: int, orig_h: int, width: int | None, height: int | None):
+    # Resize keeping aspect ratio if only one dimension supplied
+    if width and height:
+        return width, height
+    if width:
+        return width, int((width / orig_w) * orig_h)
+    if height:
+        return int((height / orig_h) * orig_w), height
+    return None
+
+def draft_jpeg(img: Image.Image, width: int | None, height: int | None):
+    # libjpeg can decode directly at 1/2, 1/4 or 1/8 scale. Ask for at least 2x the target
+    # so the final Lanczos pass still has enough pixels to work with.
+    w, h = img.size
+    rotated = img.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8)
+    if rotated:
+        w, h = h, w
+    size = target_size(w, h, width, height)
+    if not size or size[0] >= w or size[1] >= h:
+        return
+    draft_w, draft_h = size[0] * 2, size[1] * 2
+    if rotated:
+        draft_w, draft_h = draft_h, draft_w
+    img.draft(img.mode, (draft_w, draft_h))
+
+def to_rgb_mode(img: Image.Image) -> Image.Image:
+    # Resample and encode from plain RGB/RGBA: palette, CMYK etc. take slow per-mode
+    # paths in the Lanczos kernels and would be converted again by the WebP writer anyway
+    mode = "RGBA" if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info else "RGB"
+    if img.mode != mode:
+        img = img.convert(mode)
+    return img
+
+def auto_encoder_settings(size: tuple[int, int], quality: int | None, lossless: bool):
+    area = size[0] * size[1]
+    for max_area, method, level in AUTO_TIERS:
+        if max_area is None or area < max_area:
+            break
+    if lossless:
+        # For lossless, quality is the effort, so the preset picks both knobs like cwebp -z,
+        # unless --quality was given explicitly
+        preset_method, preset_effort = LOSSLESS_PRESETS[level]
+        return preset_method, preset_effort if quality is None else quality
+    return method, quality
+
+def webp_save_kwargs(size: tuple[int, int], quality: int | None, method: int | None, lossless: bool,
+                     exact: bool) -> dict:
+    if method is None:
+        method, quality = auto_encoder_settings(size, quality, lossless)
+    if quality is None:
+        quality = DEFAULT_QUALITY
+    # method 0..6 trades encode speed for size; with lossless, quality is the effort
+    return {"format": "WEBP", "quality": quality, "method": method,
+            "lossless": lossless, "exact": exact}
+
+def encode_with_libwebp(pixels, dst: Path, save_kwargs: dict, preset: str | None):
+    # Hand the RGB/RGBA pixel array to libwebp's WebPPicture import directly instead of
+    # going through Pillow's WebP writer and its intermediate copy
+    config = webp.WebPConfig.new(preset=webp.WebPPreset[(preset or "default").upper()],
+                                 quality=save_kwargs["quality"], lossless=save_kwargs["lossless"],
+                                 method=save_kwargs["method"])
+    pic = webp.WebPPicture.from_numpy(pixels)
+    pic.save(str(dst), config)
+
+def convert_animation(img: Image.Image, src: Path, dst: Path, width: int | None, height: int | None,
+                      save_kwargs: dict, preset: str | None, use_ffmpeg: bool) -> str:
+    # Returns the encoder that wrote dst. libwebp's animation encoder via ffmpeg stores
+    # partial-frame deltas instead of keyframes, but only runs with --ffmpeg-fallback.
+    if use_ffmpeg and ffmpeg_available():
+        success, error = convert_with_ffmpeg(src, dst, width, height, save_kwargs["quality"],
+                                             save_kwargs["method"], save_kwargs["lossless"], preset,
+                                             animated=True)
+        if success:
+            return "ffmpeg"
+    duration = img.info.get("duration", 100)
+    new_size = target_size(img.width, img.height, width, height)
     try:
-        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return True
-    except FileNotFoundError:
-        return False
+        if not new_size:
+            # Pillow seeks through the source and feeds one frame at a time to WebPAnimEncoder
+            img.save(dst, save_all=True, loop=0, duration=duration, **save_kwargs)
+        else:
+            # Frames always resize with Pillow; --resize-backend only applies to stills
+            frames = (to_rgb_mode(frame).resize(new_size, Image.LANCZOS, reducing_gap=3.0)
+                      for frame in ImageSequence.Iterator(img))
+            first = next(frames)
+            first.save(dst, save_all=True, append_images=frames, loop=0, duration=duration, **save_kwargs)
+    except Exception:
+        # fallback: save first frame only
+        img.seek(0)
+        first = to_rgb_mode(img)
+        if new_size:
+            first = first.resize(new_size, Image.LANCZOS, reducing_gap=3.0)
+        first.save(dst, **save_kwargs)
+    return "pillow"
 
-def convert_with_pillow(src: Path, dst: Path, width: int | None, height: int | None, quality: int):
+def convert_with_pillow(src: Path, dst: Path, width: int | None, height: int | None, quality: int | None,
+                        method: int | None, lossless: bool, exact: bool, resize_backend: str = "pillow",
+                        preset: str | None = None, use_ffmpeg: bool = False):
+    # Returns (success, error, encoder) where encoder names what actually wrote dst
     try:
         with Image.open(src) as img:
-            orig_w, orig_h = img.size
+            # Handle animation (GIF) before anything that would flatten it to one frame.
+            # MPO (multi-picture camera JPEG) reports is_animated too, but is a still photo
+            # whose first frame needs the EXIF rotation below.
+            if getattr(img, "is_animated", False) and img.format != "MPO":
+                size = target_size(img.width, img.height, width, height) or img.size
+                save_kwargs = webp_save_kwargs(size, quality, method, lossless, exact)
+                encoder = convert_animation(img, src, dst, width, height, save_kwargs, preset, use_ffmpeg)
+                return True, None, encoder
+            if src.suffix.lower() in JPEG_EXTS:
+                draft_jpeg(img, width, height)
             # Auto-orient using EXIF if present
             try:
                 img = ImageOps.exif_transpose(img)
             except Exception:
                 pass
+            img = to_rgb_mode(img)
 
-            # Resize keeping aspect ratio if only one dimension supplied
-            if width and height:
-                new_size = (width, height)
-                img = img.resize(new_size, Image.LANCZOS)
-            elif width:
-                new_h = int((width / orig_w) * orig_h)
-                img = img.resize((width, new_h), Image.LANCZOS)
-            elif height:
-                new_w = int((height / orig_h) * orig_w)
-                img = img.resize((new_w, height), Image.LANCZOS)
-
-            # Handle animation (GIF)
-            save_kwargs = {"format": "WEBP", "quality": quality}
-            if getattr(img, "is_animated", False):
-                # Preserve animation frames
-                frames = []
-                try:
-                    for frame in ImageSequence.Iterator(img):
-                        frames.append(frame.copy())
-                    frames[0].save(dst, save_all=True, append_images=frames[1:], loop=0,
-                                   duration=img.info.get("duration", 100), **save_kwargs)
-                except Exception as e:
-                    # fallback: save first frame only
-                    frames[0].save(dst, **save_kwargs)
-            else:
-                img.save(dst, **save_kwargs)
-        return True, None
+            # The binding doesn't expose libwebp's `exact` flag, so that case stays on Pillow
+            use_libwebp = webp is not None and not exact
+            new_size = target_size(img.width, img.height, width, height)
+            pixels = None
+            if new_size:
+                if resize_backend == "opencv" and use_libwebp and img.mode == "RGB":
+                    # Resized into this worker's reused scratch buffer, encoded straight from it
+                    pixels = resize_opencv_array(img, new_size)
+                else:
+                    img = resize_image(img, new_size, resize_backend)
+
+            save_kwargs = webp_save_kwargs(new_size or img.size, quality, method, lossless, exact)
+            if use_libwebp:
+                encode_with_libwebp(np.asarray(img) if pixels is None else pixels, dst, save_kwargs, preset)
+                return True, None, "libwebp"
+            img.save(dst, **save_kwargs)
+        return True, None, "pillow"
     except UnidentifiedImageError:
-        return False, "UnidentifiedImageError"
+        return False, "UnidentifiedImageError", "pillow"
     except Exception as e:
-        return False, str(e)
+        return False, str(e), "pillow"
 
-def convert_with_ffmpeg(src: Path, dst: Path, width: int | None, height: int | None, quality: int):
+def convert_with_ffmpeg(src: Path, dst: Path, width: int | None, height: int | None, quality: int | None,
+                        method: int | None, lossless: bool, preset: str | None, animated: bool = False):
     if not ffmpeg_available():
         return False, "ffmpeg-not-found"
     cmd = ["ffmpeg", "-y", "-i", str(src)]
+    cmd += ffmpeg_output_args(width, height, quality, method, lossless, preset, animated)
+    cmd += [str(dst)]
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return True, None
+    except subprocess.CalledProcessError as e:
+        return False, str(e)
+
+def convert_batch_with_ffmpeg(pairs: list[tuple[Path, Path]], width: int | None, height: int | None,
+                              quality: int | None, method: int | None, lossless: bool, preset: str | None):
+    # One ffmpeg process with N inputs mapped to N outputs, so process start-up and codec
+    # init are paid once per batch instead of once per file
+    if not ffmpeg_available():
+        return False, "ffmpeg-not-found"
+    cmd = ["ffmpeg", "-y"]
+    for src, _ in pairs:
+        cmd += ["-i", str(src)]
+    out_args = ffmpeg_output_args(width, height, quality, method, lossless, preset)
+    for i, (_, dst) in enumerate(pairs):
+        cmd += ["-map", f"{i}:v:0"] + out_args + [str(dst)]
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return True, None
+    except subprocess.CalledProcessError as e:
+        return False, str(e)
+
+def ffmpeg_output_args(width: int | None, height: int | None, quality: int | None, method: int | None,
+                       lossless: bool, preset: str | None, animated: bool = False) -> list[str]:
     # qscale for ffmpeg: lower is better quality for some encoders, but for libwebp use -q:v
     # We'll try with libwebp
+    cmd = []
     vf = None
     if width and height:
         vf = f"scale={width}:{height}"
@@ -84,61 +261,193 @@ def convert_with_ffmpeg(src: Path, dst: Path, width: int | None, height: int | N
         vf = f"scale=-1:{height}"
     if vf:
         cmd += ["-vf", vf]
+    if animated:
+        cmd += ["-c:v", "libwebp_anim", "-loop", "0"]
     # Use libwebp encoder if available; fallback to generic
-    cmd += ["-quality", str(quality), str(dst)]
-    try:
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return True, None
-    except subprocess.CalledProcessError as e:
-        return False, str(e)
-
-def ensure_parent(dst: Path):
-    if not dst.parent.exists():
-        dst.parent.mkdir(parents=True, exist_ok=True)
+    if method is None:
+        method = DEFAULT_METHOD
+    if quality is None:
+        quality = DEFAULT_QUALITY
+    cmd += ["-quality", str(quality), "-compression_level", str(method)]
+    if lossless:
+        cmd += ["-lossless", "1"]
+    if preset:
+        cmd += ["-preset", preset]
+    return cmd
 
 def process_file(src: Path, dst: Path, width: int | None, height: int | None,
-                 quality: int, skip_existing: bool, ffmpeg_fallback: bool):
-    # Ensure dst extension is .webp
-    dst = dst.with_suffix(".webp")
-    ensure_parent(dst)
-
+                 quality: int | None, method: int | None, lossless: bool, exact: bool, preset: str | None,
+                 resize_backend: str, skip_existing: bool, ffmpeg_fallback: bool):
+    # dst is already <output>/<relative path>.webp and its parent exists (see main)
     if skip_existing and dst.exists():
-        print(f"[skip] {dst} (exists)")
+        log.info("[skip] %s (exists)", dst)
         return
 
     ext = src.suffix.lower()
-    # If source is already webp and you want to copy or re-encode, we re-encode by default
+    if ext == ".webp":
+        passthrough = (width is None and height is None and quality is None and method is None
+                       and not lossless and not exact and preset is None)
+        if passthrough:
+            # Already WebP and no resize or encoder option asked for: copy the bytes instead
+            # of a lossy round-trip
+            try:
+                shutil.copyfile(src, dst)
+            except shutil.SameFileError:
+                log.warning("[skip] %s: source and destination are the same file", src)
+                return
+            except OSError as e:
+                log.warning("[copy-fail] %s: %s", src, e)
+                return
+            log.info("[copy] %s -> %s", src, dst)
+            return
+        # Re-encoding (resize or explicit encoder options); keep RGB under transparent areas
+        exact = True
     if ext in PIL_SUPPORTED:
         # use Pillow
-        success, error = convert_with_pillow(src, dst, width, height, quality)
+        success, error, encoder = convert_with_pillow(src, dst, width, height, quality, method, lossless,
+                                                      exact, resize_backend, preset, ffmpeg_fallback)
         if success:
-            print(f"[pillow] {src} -> {dst}")
+            log.info("[%s] %s -> %s", encoder, src, dst)
             return
         else:
-            print(f"[pillow-fail] {src}: {error}")
+            log.warning("[pillow-fail] %s: %s", src, error)
             # fall through to ffmpeg if enabled
     # If not supported by Pillow or pillow failed, try ffmpeg fallback
     if ffmpeg_fallback:
-        success, error = convert_with_ffmpeg(src, dst, width, height, quality)
+        success, error = convert_with_ffmpeg(src, dst, width, height, quality, method, lossless, preset)
         if success:
-            print(f"[ffmpeg] {src} -> {dst}")
+            log.info("[ffmpeg] %s -> %s", src, dst)
             return
         else:
-            print(f"[ffmpeg-fail] {src}: {error}")
+            log.warning("[ffmpeg-fail] %s: %s", src, error)
             return
     else:
-        print(f"[skip] {src}: unsupported format and ffmpeg fallback disabled.")
+        log.warning("[skip] %s: unsupported format and ffmpeg fallback disabled.", src)
+
+def _worker(task):
+    # Top-level so it pickles cleanly for ProcessPoolExecutor; task is a plain tuple of
+    # (src, dst, width, height, quality, method, lossless, exact, preset, resize_backend,
+    #  skip_existing, ffmpeg_fallback)
+    process_file(*task)
+
+def _ffmpeg_batch_worker(task):
+    # task is (pairs, width, height, quality, method, lossless, preset, skip_existing)
+    pairs, width, height, quality, method, lossless, preset, skip_existing = task
+    if skip_existing:
+        for src, dst in pairs:
+            if dst.exists():
+                log.info("[skip] %s (exists)", dst)
+        pairs = [(src, dst) for src, dst in pairs if not dst.exists()]
+    if not pairs:
+        return
+    success, error = convert_batch_with_ffmpeg(pairs, width, height, quality, method, lossless, preset)
+    if success:
+        for src, dst in pairs:
+            log.info("[ffmpeg] %s -> %s", src, dst)
+        return
+    # One bad input fails the whole batch; redo it file by file to isolate the failure
+    for src, dst in pairs:
+        success, error = convert_with_ffmpeg(src, dst, width, height, quality, method, lossless, preset)
+        if success:
+            log.info("[ffmpeg] %s -> %s", src, dst)
+        else:
+            log.warning("[ffmpeg-fail] %s: %s", src, error)
 
-def collect_sources(path: Path):
+def collect_sources(path: Path, exts: set[str] | None = None):
+    # exts filters by lowercase suffix so unsupported files never enter the work queue
     if path.is_file():
         return [path]
+    # os.scandir reuses the d_type from the directory read, so no extra stat per entry
     files = []
-    for p in path.rglob("*"):
-        if p.is_file():
-            files.append(p)
+    stack = [str(path)]
+    while stack:
+        folder = stack.pop()
+        try:
+            it = os.scandir(folder)
+        except OSError as e:
+            # e.g. "System Volume Information" on a drive root: skip it, keep going
+            log.warning("[skip] %s: %s", folder, e.strerror or e)
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif exts is None or os.path.splitext(entry.name)[1].lower() in exts:
+                    if entry.is_file():
+                        files.append(Path(entry.path))
     return files
 
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> bytes:
+    h = file_hasher()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.digest()
+
+def find_duplicates(sources: list[Path]) -> dict[Path, list[Path]]:
+    # Returns {representative: [identical copies]}. Files are grouped by size first, so
+    # only files that share their size with another one are ever read and hashed.
+    by_size = {}
+    for src in sources:
+        by_size.setdefault(src.stat().st_size, []).append(src)
+    duplicates = {}
+    for same_size in by_size.values():
+        if len(same_size) < 2:
+            continue
+        by_digest = {}
+        for src in same_size:
+            by_digest.setdefault(file_digest(src), []).append(src)
+        for group in by_digest.values():
+            if len(group) > 1:
+                duplicates[group[0]] = group[1:]
+    return duplicates
+
+def link_or_copy(src: Path, dst: Path):
+    # os.link won't replace an existing file, so build the new entry under a temporary
+    # name and swap it in: dst is only replaced once the link (or, across devices and on
+    # FAT/exFAT, the copy) has succeeded
+    tmp = dst.with_name(f".{dst.name}.dedup-tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        raise
+
+def run_tasks(tasks: list, batches: list, jobs: int, queue, level: int):
+    if jobs == 1 or len(tasks) + len(batches) == 1:
+        for task in tasks:
+            _worker(task)
+        for batch in batches:
+            _ffmpeg_batch_worker(batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=setup_logging, initargs=(queue, level)) as ex:
+        futures = [ex.submit(_ffmpeg_batch_worker, batch) for batch in batches]
+        list(ex.map(_worker, tasks, chunksize=8))
+        for future in futures:
+            future.result()
+
+def positive_int(val: str) -> int:
+    n = int(val)
+    if n < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return n
+
 def main():
+    queue = multiprocessing.Queue()
+    listener = QueueListener(queue, logging.StreamHandler())
+    listener.start()
+    try:
+        convert(queue)
+    finally:
+        listener.stop()
+
+def convert(queue):
     parser = argparse.ArgumentParser(description="Convert images to WebP preserving folder structure.")
     parser.add_argument("--input", "-i", type=Path, default=DEFAULT_INPUT,
                         help="Input file or folder (default: ./input)")
@@ -146,42 +455,139 @@ def main():
                         help="Output folder (default: ./output)")
     parser.add_argument("--width", type=int, default=None, help="Target width (pixels)")
     parser.add_argument("--height", type=int, default=None, help="Target height (pixels)")
-    parser.add_argument("--quality", type=int, default=60, help="Quality 0-100 (default: 90)")
+    parser.add_argument("--quality", type=int, default=None,
+                        help="Quality 0-100, or effort with --lossless (default: 60; with --lossless "
+                             "and no --method, the effort of the auto-picked cwebp -z preset)")
+    parser.add_argument("--method", type=int, choices=range(7), default=None, metavar="0-6",
+                        help="libwebp method, 0=fastest 6=smallest (default: by output size, 0 below "
+                             "256x256, 2 below 1024x1024, else 4; with --lossless a cwebp -z preset)")
+    parser.add_argument("--lossless", action="store_true", help="Encode lossless WebP (--quality becomes effort)")
+    parser.add_argument("--exact", action="store_true", help="Preserve RGB values under transparent areas")
+    parser.add_argument("--webp-preset", choices=WEBP_PRESETS, default=None,
+                        help="libwebp preset (ffmpeg and the optional webp package; Pillow has none)")
+    parser.add_argument("--resize-backend", choices=RESIZE_BACKENDS, default="pillow",
+                        help="Resizer for still images (default: pillow)")
     parser.add_argument("--skip-existing", action="store_true", help="Skip files that already exist in output")
     parser.add_argument("--ffmpeg-fallback", action="store_true", help="Use ffmpeg when Pillow cannot handle the file")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Encode identical source files once and hard-link the other outputs")
+    parser.add_argument("--verbose", "-v", action="store_true",
+                        help="Report every converted/skipped file (default: warnings and errors only)")
+    parser.add_argument("--jobs", "-j", type=positive_int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
     args = parser.parse_args()
 
+    level = logging.INFO if args.verbose else logging.WARNING
+    setup_logging(queue, level)
+
     src_path: Path = args.input
     out_root: Path = args.output
     width = args.width
     height = args.height
     quality = args.quality
+    method = args.method  # None: picked per image from the output size
+    lossless = args.lossless
+    exact = args.exact
+    preset = args.webp_preset
+    resize_backend = args.resize_backend
     skip_existing = args.skip_existing
     ffmpeg_fallback = args.ffmpeg_fallback
+    jobs = args.jobs or os.cpu_count() or 1
+    if sys.platform == "win32":
+        # ProcessPoolExecutor refuses more workers than this on Windows (WaitForMultipleObjects)
+        jobs = min(jobs, WINDOWS_MAX_WORKERS)
 
     # Validate
     if not src_path.exists():
-        print(f"Input path does not exist: {src_path}", file=sys.stderr)
+        log.error("Input path does not exist: %s", src_path)
         sys.exit(2)
+    if not backend_available(resize_backend):
+        log.error("Resize backend '%s' is not installed", resize_backend)
+        sys.exit(2)
+
+    log.info("[info] using %s", pillow_variant())
+
+    # A single input file may name its output file directly (file.jpg -> out/file.webp);
+    # anything else is an output folder
+    out_file = None
+    if src_path.is_file() and out_root.suffix.lower() == ".webp" and not out_root.is_dir():
+        out_file, out_root = out_root, out_root.parent
 
     # Create output root if missing
     out_root.mkdir(parents=True, exist_ok=True)
 
-    sources = collect_sources(src_path)
+    # Without the ffmpeg fallback anything Pillow can't open would only be skipped
+    sources = collect_sources(src_path, None if ffmpeg_fallback else PIL_SUPPORTED)
     if not sources:
-        print("No files found to process.")
+        log.warning("No files found to process.")
         return
 
-    for src in sources:
+    # Precompute all (src, dst) pairs here so workers only decode + resize + encode.
+    # photo.jpg and photo.png both map to photo.webp: keep the first in sorted order so the
+    # same file wins on every run, instead of two workers racing on one output
+    dst_of = {}
+    claimed = {}
+    for src in sorted(sources):
         # Compute relative path from input root; if single file input, use its name
         if src_path.is_dir():
             rel = src.relative_to(src_path)
         else:
             rel = src.name
-        dst = out_root / rel
-        process_file(src, dst, width, height, quality, skip_existing, ffmpeg_fallback)
+        dst = out_file or (out_root / rel).with_suffix(".webp")
+        key = os.path.normcase(dst)
+        if key in claimed:
+            log.warning("[skip] %s: output %s already taken by %s", src, dst, claimed[key])
+            continue
+        claimed[key] = src
+        dst_of[src] = dst
+    sources = list(dst_of)
+
+    duplicates = find_duplicates(sources) if args.dedup and len(sources) > 1 else {}
+    copies = {src for group in duplicates.values() for src in group}
+
+    tasks = []
+    ffmpeg_pairs = []
+    seen_dirs = {out_root}
+    for src, dst in dst_of.items():
+        if dst.parent not in seen_dirs:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            seen_dirs.add(dst.parent)
+        if src in copies:
+            continue
+        if ffmpeg_fallback and src.suffix.lower() not in PIL_SUPPORTED and ffmpeg_available():
+            ffmpeg_pairs.append((src, dst))
+            continue
+        tasks.append((src, dst, width, height, quality, method, lossless, exact, preset, resize_backend,
+                      skip_existing, ffmpeg_fallback))
+
+    # Split ffmpeg-only files into batches, but not so few that workers sit idle
+    batch_size = max(1, min(FFMPEG_BATCH, -(-len(ffmpeg_pairs) // jobs)))
+    batches = [(ffmpeg_pairs[i:i + batch_size], width, height, quality, method, lossless, preset,
+                skip_existing)
+               for i in range(0, len(ffmpeg_pairs), batch_size)]
+
+    run_tasks(tasks, batches, jobs, queue, level)
+
+    # Identical sources give identical outputs: reuse the representative's result
+    for rep, group in duplicates.items():
+        rep_dst = dst_of[rep]
+        if not rep_dst.exists():
+            # The representative failed; its copies would fail the same way
+            continue
+        for src in group:
+            dst = dst_of[src]
+            if dst.exists() and os.path.samefile(dst, rep_dst):
+                # Already linked by an earlier run: nothing to do
+                continue
+            if skip_existing and dst.exists():
+                log.info("[skip] %s (exists)", dst)
+                continue
+            try:
+                link_or_copy(rep_dst, dst)
+            except OSError as e:
+                log.warning("[dedup-fail] %s: %s", src, e)
+                continue
+            log.info("[dedup] %s -> %s (same as %s)", src, dst, rep)
 
 if __name__ == "__main__":
-    # Lazy imports used in functions
-    from PIL import ImageSequence, ImageOps  # imported here to avoid top-level complexity
     main()
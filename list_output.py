@@ -9,12 +9,15 @@ Usage examples:
   python list_output.py
   python list_output.py --root ./output --out ./output_list.json
   python list_output.py --root ./output --recursive False --include-dirs True
+  python list_output.py --root /big/tree --threads 16
 """
 
 from pathlib import Path
 import json
 import argparse
-from typing import List
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, List, Tuple
 
 
 def list_files(
@@ -22,65 +25,132 @@ def list_files(
     recursive: bool = True,
     include_dirs: bool = False,
     follow_symlinks: bool = False,
-    return_relative: bool = True
-) -> List[str]:
+    return_relative: bool = True,
+    threads: int = 1
+) -> Iterator[str]:
     """
-    Return a list of file (and optionally directory) paths under `root`.
+    Yield file (and optionally directory) paths under `root`.
 
     Paths are returned as POSIX-style strings (forward slashes).
     If `return_relative` is True, returned paths are relative to `root`.
+    The root is checked up front, so a missing folder raises before iteration starts.
+    With `threads` > 1 a recursive walk reads several directories concurrently; the
+    order of the results is then not deterministic.
     """
     root = Path(root)
     if not root.exists():
         raise FileNotFoundError(f"Root path does not exist: {root}")
 
-    results: List[str] = []
-    if recursive:
-        for p in root.rglob('*'):
-            # Skip the root itself
-            if p == root:
-                continue
-            try:
-                is_dir = p.is_dir()
-            except OSError:
-                # If cannot stat the file for some reason, skip it
-                continue
+    base = str(root) if return_relative else str(root.resolve())
+    return _scan(base, recursive, include_dirs, follow_symlinks, return_relative, threads)
 
-            if is_dir:
-                if include_dirs:
-                    path_str = p.relative_to(root).as_posix() if return_relative else p.resolve().as_posix()
-                    results.append(path_str)
-            else:
-                # it's a file
-                path_str = p.relative_to(root).as_posix() if return_relative else p.resolve().as_posix()
-                results.append(path_str)
-    else:
-        # non-recursive: list only immediate children
-        for p in sorted(root.iterdir()):
-            try:
-                is_dir = p.is_dir()
-            except OSError:
-                continue
 
-            if is_dir:
-                if include_dirs:
-                    path_str = p.relative_to(root).as_posix() if return_relative else p.resolve().as_posix()
-                    results.append(path_str)
-            else:
-                path_str = p.relative_to(root).as_posix() if return_relative else p.resolve().as_posix()
-                results.append(path_str)
+def _read_dir(path: str, recursive: bool, follow_symlinks: bool) -> Tuple[List[Tuple[str, bool]], List[str]]:
+    """
+    Read one directory with os.scandir.
 
-    return results
+    Returns (entries, subdirs): `entries` are (path, is_dir) pairs and `subdirs` are the
+    directories to descend into next. DirEntry.is_dir()/is_symlink() answer from the d_type
+    returned by the directory read itself, so there is no extra stat per entry.
+    """
+    entries: List[Tuple[str, bool]] = []
+    subdirs: List[str] = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    # If cannot stat the file for some reason, skip it
+                    continue
+                if is_dir and recursive and (follow_symlinks or not entry.is_symlink()):
+                    subdirs.append(entry.path)
+                entries.append((entry.path, is_dir))
+    except OSError:
+        # Unreadable directory, skip it
+        pass
+    return entries, subdirs
+
+
+def _walk_serial(base: str, recursive: bool, follow_symlinks: bool) -> Iterator[List[Tuple[str, bool]]]:
+    stack = [base]
+    while stack:
+        entries, subdirs = _read_dir(stack.pop(), recursive, follow_symlinks)
+        stack.extend(subdirs)
+        if not recursive:
+            # non-recursive: list only immediate children, in name order
+            entries.sort()
+        yield entries
+
+
+def _walk_threaded(base: str, follow_symlinks: bool, threads: int) -> Iterator[List[Tuple[str, bool]]]:
+    """
+    Read up to `threads` directories at once.
+
+    os.scandir releases the GIL while the kernel reads directory entries, so on large trees
+    (and especially network or cold-cache filesystems) the reads overlap instead of queueing.
+    Directories are yielded in completion order.
+    """
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        pending = {ex.submit(_read_dir, base, True, follow_symlinks)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                entries, subdirs = fut.result()
+                pending.update(ex.submit(_read_dir, d, True, follow_symlinks) for d in subdirs)
+                yield entries
+
+
+def _scan(
+    base: str,
+    recursive: bool,
+    include_dirs: bool,
+    follow_symlinks: bool,
+    return_relative: bool,
+    threads: int
+) -> Iterator[str]:
+    """
+    Walk `base` and yield formatted paths, one directory batch at a time.
+    """
+    root_len = len(os.path.join(base, ""))
+    if recursive and threads > 1:
+        batches = _walk_threaded(base, follow_symlinks, threads)
+    else:
+        batches = _walk_serial(base, recursive, follow_symlinks)
+
+    for entries in batches:
+        for path, is_dir in entries:
+            if is_dir and not include_dirs:
+                continue
+            path_str = path[root_len:] if return_relative else path
+            if os.sep != "/":
+                path_str = path_str.replace(os.sep, "/")
+            yield path_str
 
 
-def save_json_list(items: List[str], out_path: Path, indent: int = 2):
+def save_json_list(items: Iterable[str], out_path: Path, indent: int = 2) -> int:
     """
-    Save list of strings to JSON file (overwrites if exists).
+    Save strings to a JSON array file (overwrites if exists) and return how many were written.
+
+    Items are written as they arrive, so a generator such as list_files() is streamed to
+    disk while the walk is still running instead of being collected in memory first.
+    The output matches json.dump(list(items), indent=indent).
     """
     out_path = Path(out_path)
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    if indent is None:
+        first_sep, sep, end = "", ", ", "]"
+    else:
+        pad = "\n" + " " * indent
+        first_sep, sep, end = pad, "," + pad, "\n]"
+    count = 0
     with out_path.open("w", encoding="utf-8") as f:
-        json.dump(items, f, ensure_ascii=False, indent=indent)
+        f.write("[")
+        for item in items:
+            f.write((sep if count else first_sep) + json.dumps(item, ensure_ascii=False))
+            count += 1
+        f.write(end if count else "]")
+    return count
 
 
 def parse_bool(val: str) -> bool:
@@ -104,6 +174,8 @@ def main():
                         help="Include directories in the list (default: files only)")
     parser.add_argument("--absolute", "-a", action="store_true",
                         help="Return absolute paths instead of relative paths")
+    parser.add_argument("--threads", "-t", type=int, default=1,
+                        help="Directories to read concurrently when recursive (default: 1)")
     parser.add_argument("--indent", type=int, default=2,
                         help="JSON indent level (default: 2)")
 
@@ -115,14 +187,15 @@ def main():
             recursive=args.recursive,
             include_dirs=args.include_dirs,
             follow_symlinks=False,
-            return_relative=not args.absolute
+            return_relative=not args.absolute,
+            threads=args.threads
         )
     except FileNotFoundError as e:
         print(f"Error: {e}")
         return
 
-    save_json_list(items, args.out, indent=args.indent)
-    print(f"Wrote {len(items)} entries to {args.out}")
+    count = save_json_list(items, args.out, indent=args.indent)
+    print(f"Wrote {count} entries to {args.out}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+resize.py
+
+Resize backends used by init.py.
+
+  pillow  Image.resize with Lanczos (uses Pillow-SIMD kernels when that is installed)
+  opencv  cv2.resize with INTER_LANCZOS4; RGB results can be written into per-process
+          scratch buffers reused across files of the same output size and handed to
+          libwebp as-is (see resize_opencv_array); needs `pip install opencv-python-headless`
+  numpy   Lanczos-3 with the filter taps precomputed once per (source, target) size pair
+          and cached, so a folder of same-size images reuses them; needs numpy
+"""
+
+from functools import lru_cache
+
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+RESIZE_BACKENDS = ("pillow", "opencv", "numpy")
+LANCZOS_BLOCK = 16  # outputs per dense tile of the banded Lanczos matrix
+MAX_SCRATCH_BUFFERS = 8
+
+# (height, width, channels) -> reusable uint8 output buffer. Every worker process gets its
+# own copy of this module, so buffers are never shared between concurrent conversions.
+_scratch = {}
+
+
+def backend_available(backend: str) -> bool:
+    if backend == "opencv":
+        return cv2 is not None and np is not None
+    if backend == "numpy":
+        return np is not None
+    return backend in RESIZE_BACKENDS
+
+
+def _scratch_buffer(shape):
+    buf = _scratch.get(shape)
+    if buf is None:
+        if len(_scratch) >= MAX_SCRATCH_BUFFERS:
+            # Mixed output sizes: don't let the cache grow without bound
+            _scratch.clear()
+        buf = _scratch[shape] = np.empty(shape, np.uint8)
+    return buf
+
+
+def resize_opencv_array(img: Image.Image, size):
+    """
+    Resize an RGB image with OpenCV into a reused scratch buffer and return that buffer.
+
+    No output is allocated per file: the array is overwritten by the next resize to the
+    same size in this process, so hand it to the encoder (WebPPicture.from_numpy copies
+    it into libwebp's own picture) before resizing anything else.
+    """
+    src = np.asarray(img)
+    w, h = size
+    dst = _scratch_buffer((h, w, src.shape[2]))
+    cv2.resize(src, (w, h), dst=dst, interpolation=cv2.INTER_LANCZOS4)
+    return dst
+
+
+def resize_opencv(img: Image.Image, size) -> Image.Image:
+    """
+    Resize an RGB/RGBA image with OpenCV and return a new Pillow image.
+    """
+    mode = _premultiplied_mode(img)
+    src = np.asarray(img.convert(mode) if mode != img.mode else img)
+    out = cv2.resize(src, tuple(size), interpolation=cv2.INTER_LANCZOS4)
+    return _from_buffer(out, size, mode, img.mode)
+
+
+def _premultiplied_mode(img: Image.Image) -> str:
+    # Like Image.resize, filter RGBA premultiplied so fully transparent pixels don't bleed
+    # their colour into the edges
+    return "RGBa" if img.mode == "RGBA" else img.mode
+
+
+def _from_buffer(buf, size, mode: str, out_mode: str) -> Image.Image:
+    out = Image.frombuffer(mode, size, buf, "raw", mode, 0, 1)
+    return out.convert(out_mode) if mode != out_mode else out
+
+
+def _lanczos3(x):
+    # np.sinc(x) is sin(pi x) / (pi x)
+    return np.where(np.abs(x) < 3.0, np.sinc(x) * np.sinc(x / 3.0), 0.0)
+
+
+@lru_cache(maxsize=32)
+def lanczos_weights(in_size: int, out_size: int):
+    """
+    Return (indices, weights), both shaped (out_size, taps), for resampling one axis.
+
+    Follows Pillow's precompute_coeffs: on downscale the support widens with the scale
+    factor so the filter antialiases, taps outside the source are zeroed and every row
+    is normalised to sum to 1. The arrays are cached and must not be modified.
+    """
+    scale = in_size / out_size
+    filterscale = max(scale, 1.0)
+    support = 3.0 * filterscale
+    taps = int(np.ceil(support)) * 2 + 1
+
+    centers = (np.arange(out_size) + 0.5) * scale
+    xmin = np.maximum((centers - support + 0.5).astype(np.int64), 0)
+    xmax = np.minimum((centers + support + 0.5).astype(np.int64), in_size)
+    indices = xmin[:, None] + np.arange(taps)
+    weights = _lanczos3((indices - centers[:, None] + 0.5) / filterscale)
+    weights[indices >= xmax[:, None]] = 0.0
+    weights /= weights.sum(axis=1, keepdims=True)
+    indices = np.minimum(indices, in_size - 1)
+
+    weights = weights.astype(np.float32)
+    indices.flags.writeable = False
+    weights.flags.writeable = False
+    return indices, weights
+
+
+@lru_cache(maxsize=32)
+def lanczos_blocks(in_size: int, out_size: int):
+    """
+    Split the banded Lanczos matrix for one axis into dense tiles.
+
+    Each tile covers LANCZOS_BLOCK consecutive outputs and only the source span their taps
+    reach, so resampling becomes a handful of small float32 matrix products. Those run in
+    the BLAS sgemm kernels (AVX2/FMA on current x86) instead of a Python loop over taps.
+    Returns a list of (start, stop, lo, hi, matrix) with matrix shaped (stop - start, hi - lo).
+    """
+    indices, weights = lanczos_weights(in_size, out_size)
+    blocks = []
+    for start in range(0, out_size, LANCZOS_BLOCK):
+        stop = min(start + LANCZOS_BLOCK, out_size)
+        idx = indices[start:stop]
+        lo, hi = int(idx.min()), int(idx.max()) + 1
+        matrix = np.zeros((stop - start, hi - lo), np.float32)
+        # add.at because clamped edge taps repeat the same source index
+        rows = np.repeat(np.arange(stop - start), idx.shape[1])
+        np.add.at(matrix, (rows, (idx - lo).ravel()), weights[start:stop].ravel())
+        matrix.flags.writeable = False
+        blocks.append((start, stop, lo, hi, matrix))
+    return blocks
+
+
+def _resample_axis(arr, out_size: int, axis: int):
+    height, width, channels = arr.shape
+    if axis == 0:
+        src = arr.reshape(height, width * channels)
+        out = np.empty((out_size, width * channels), np.float32)
+        for start, stop, lo, hi, matrix in lanczos_blocks(height, out_size):
+            np.matmul(matrix, src[lo:hi], out=out[start:stop])
+        return out.reshape(out_size, width, channels)
+
+    out = np.empty((height, out_size, channels), np.float32)
+    for start, stop, lo, hi, matrix in lanczos_blocks(width, out_size):
+        # Batched over rows: (stop - start, span) @ (height, span, channels)
+        np.matmul(matrix, arr[:, lo:hi], out=out[:, start:stop])
+    return out
+
+
+def resize_numpy(img: Image.Image, size) -> Image.Image:
+    w, h = size
+    mode = _premultiplied_mode(img)
+    arr = np.asarray(img.convert(mode) if mode != img.mode else img, dtype=np.float32)
+    if arr.ndim == 2:
+        arr = arr[:, :, None]
+    # Run the more reducing pass first so the second one touches fewer pixels
+    passes = [(0, h), (1, w)]
+    if w / img.width < h / img.height:
+        passes.reverse()
+    for axis, out_size in passes:
+        if arr.shape[axis] != out_size:
+            arr = _resample_axis(arr, out_size, axis)
+    out = np.clip(np.rint(arr), 0, 255).astype(np.uint8)
+    return _from_buffer(out, size, mode, img.mode)
+
+
+def resize_image(img: Image.Image, size, backend: str = "pillow") -> Image.Image:
+    if backend == "opencv":
+        return resize_opencv(img, size)
+    if backend == "numpy":
+        return resize_numpy(img, size)
+    # reducing_gap does a cheap box reduction first on large downscales
+    return img.resize(size, Image.LANCZOS, reducing_gap=3.0)